@@ -1465,9 +1465,6 @@ class Figure(wx.Frame):
             normalize_args = {}
 
         if self.dimensions == 2:
-            orig_vmin = vmin
-            orig_vmax = vmax
-
             if interpolation is None:
                 interpolation = get_matplotlib_interpolation_preference()
 
@@ -1611,19 +1608,6 @@ class Figure(wx.Frame):
             if title is not None:
                 self.set_subplot_title(title, x, y)
 
-            # Update colorbar
-            if orig_vmin is not None:
-                tick_vmin = orig_vmin
-            elif normalize == "log":
-                tick_vmin = image[image > 0].min()
-            else:
-                tick_vmin = image.min()
-
-            if orig_vmax is not None:
-                tick_vmax = orig_vmax
-            else:
-                tick_vmax = image.max()
-
             if isinstance(colormap, six.string_types):
                 colormap = matplotlib.cm.ScalarMappable(cmap=colormap)
 
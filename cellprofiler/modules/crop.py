@@ -42,10 +42,6 @@ help for more information on saving cropping shapes.
 import logging
 import math
 
-import matplotlib.axes
-import matplotlib.cm
-import matplotlib.figure
-import matplotlib.patches
 import numpy
 from centrosome.filter import stretch
 
@@ -518,9 +514,9 @@ objects:
         area_retained_after_cropping = numpy.sum(cropping)
         feature = FF_AREA_RETAINED % self.cropped_image_name.value
         m = workspace.measurements
-        m.add_measurement("Image", feature, numpy.array([area_retained_after_cropping]))
+        m.add_measurement("Image", feature, int(area_retained_after_cropping))
         feature = FF_ORIGINAL_AREA % self.cropped_image_name.value
-        m.add_measurement("Image", feature, numpy.array([original_image_area]))
+        m.add_measurement("Image", feature, int(original_image_area))
 
     def display(self, workspace, figure):
         orig_image_pixel_data = workspace.display_data.orig_image_pixel_data
@@ -560,6 +556,12 @@ objects:
             return self.apply_rectangle_cropping(workspace, orig_image)
 
     def handle_interaction(self, current_shape, orig_image):
+        # matplotlib is only needed for this interactive dialog, so defer
+        # the import to keep it out of headless runs
+        import matplotlib.axes
+        import matplotlib.cm
+        import matplotlib.figure
+        import matplotlib.patches
         from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg
         import wx
 
@@ -469,7 +469,7 @@ color map.
             else:
                 pixel_data = (labels != 0).astype(numpy.float32)
             if pixel_data.ndim == 3:
-                pixel_data = numpy.sum(pixel_data, 2) / pixel_data.shape[2]
+                pixel_data = pixel_data.mean(2)
             colormap_name = self.colormap.value
             if colormap_name == "Default":
                 colormap_name = cellprofiler_core.preferences.get_default_colormap()
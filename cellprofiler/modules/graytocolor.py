@@ -518,11 +518,13 @@ pixel values are multiplied by this weight before assigning the color.
                                 image.pixel_data.shape,
                             )
                         )
-                    rgb_pixel_data += np.dstack([pixel_data] * 3) * multiplier
+                    # Broadcast against the channel multipliers instead
+                    # of stacking three copies of the image first
+                    rgb_pixel_data += pixel_data[:, :, np.newaxis] * multiplier
                 else:
                     parent_image = image
                     parent_image_name = color_scheme_setting.image_name.value
-                    rgb_pixel_data = np.dstack([pixel_data] * 3) * multiplier
+                    rgb_pixel_data = pixel_data[:, :, np.newaxis] * multiplier
         else:
             input_image_names = [sc.image_name.value for sc in self.stack_channels]
             channel_names = input_image_names
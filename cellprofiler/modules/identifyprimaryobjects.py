@@ -1,16 +1,27 @@
 # coding=utf-8
 
+import functools
 import math
 
 import centrosome.cpmorphology
-import centrosome.outline
 import centrosome.propagate
 import centrosome.threshold
 import numpy
 import scipy.ndimage
+import scipy.signal
 import scipy.sparse
 import skimage.morphology
 
+try:
+    from skimage.segmentation import watershed
+except ImportError:  # watershed lived in skimage.morphology before scikit-image 0.17
+    from skimage.morphology import watershed
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
 import cellprofiler.gui.help
 import cellprofiler.gui.help.content
 import cellprofiler_core.object
@@ -321,6 +332,47 @@ SHAPE_DECLUMPING_ICON = cellprofiler.gui.help.content.image_resource(
 )
 
 
+# 8-connected structuring element shared by the labeling and watershed
+# calls - built once instead of per cycle
+EIGHT_CONNECT = numpy.ones((3, 3), bool)
+
+
+@functools.lru_cache(maxsize=8)
+def strel_disk(radius):
+    """Memoized disk structuring element
+
+    The radius is fixed by the module settings, so every cycle asks for
+    the same disk; callers must treat the returned array as read-only.
+    """
+    return centrosome.cpmorphology.strel_disk(radius)
+
+
+def distance_transform(foreground):
+    """Exact euclidean distance transform of a boolean foreground mask
+
+    Uses OpenCV's SIMD implementation when the package is available and
+    falls back to scipy.ndimage otherwise. Both backends compute the
+    precise distance, so declumping results do not depend on which one
+    is installed.
+    """
+    if cv2 is not None:
+        return cv2.distanceTransform(
+            foreground.astype(numpy.uint8), cv2.DIST_L2, cv2.DIST_MASK_PRECISE
+        ).astype(float)
+    # Reuse the output buffer across cycles - images in a run share a
+    # shape, so this saves a large allocation per call. The buffer is
+    # fully overwritten each time and is never live across two calls.
+    distances = distance_transform._distances
+    if distances is None or distances.shape != foreground.shape:
+        distances = numpy.empty(foreground.shape)
+        distance_transform._distances = distances
+    scipy.ndimage.distance_transform_edt(foreground, distances=distances)
+    return distances
+
+
+distance_transform._distances = None
+
+
 class IdentifyPrimaryObjects(
     cellprofiler_core.module.image_segmentation.ImageSegmentation
 ):
@@ -1059,8 +1111,12 @@ If "*{NO}*" is selected, the following settings are used:
         #
         # Fill background holes inside foreground objects
         #
+        # fill_labeled_holes calls back once per hole, so parse the size
+        # range setting once instead of on every call
+        max_hole_size = self.size_range.max * self.size_range.max
+
         def size_fn(size, is_foreground):
-            return size < self.size_range.max * self.size_range.max
+            return size < max_hole_size
 
         if self.basic or self.fill_holes.value == FH_THRESHOLDING:
             binary_image = centrosome.cpmorphology.fill_labeled_holes(
@@ -1068,7 +1124,7 @@ If "*{NO}*" is selected, the following settings are used:
             )
 
         labeled_image, object_count = scipy.ndimage.label(
-            binary_image, numpy.ones((3, 3), bool)
+            binary_image, EIGHT_CONNECT
         )
 
         (
@@ -1079,17 +1135,23 @@ If "*{NO}*" is selected, the following settings are used:
 
         unedited_labels = labeled_image.copy()
 
+        # The excluded-label images only feed the display, so skip the
+        # copies and zeroing passes in headless runs
+        show_window = self.show_window
+
         # Filter out objects touching the border or mask
-        border_excluded_labeled_image = labeled_image.copy()
+        border_excluded_labeled_image = labeled_image.copy() if show_window else None
         labeled_image = self.filter_on_border(image, labeled_image)
-        border_excluded_labeled_image[labeled_image > 0] = 0
+        if show_window:
+            border_excluded_labeled_image[labeled_image > 0] = 0
 
         # Filter out small and large objects
-        size_excluded_labeled_image = labeled_image.copy()
+        size_excluded_labeled_image = labeled_image.copy() if show_window else None
         labeled_image, small_removed_labels = self.filter_on_size(
             labeled_image, object_count
         )
-        size_excluded_labeled_image[labeled_image > 0] = 0
+        if show_window:
+            size_excluded_labeled_image[labeled_image > 0] = 0
 
         #
         # Fill holes again after watershed
@@ -1103,28 +1165,21 @@ If "*{NO}*" is selected, the following settings are used:
         if self.advanced and self.limit_choice.value == LIMIT_ERASE:
             if object_count > self.maximum_object_count.value:
                 labeled_image = numpy.zeros(labeled_image.shape, int)
-                border_excluded_labeled_image = numpy.zeros(labeled_image.shape, int)
-                size_excluded_labeled_image = numpy.zeros(labeled_image.shape, int)
+                if show_window:
+                    border_excluded_labeled_image = numpy.zeros(
+                        labeled_image.shape, int
+                    )
+                    size_excluded_labeled_image = numpy.zeros(labeled_image.shape, int)
                 object_count = 0
 
-        # Make an outline image
-        outline_image = centrosome.outline.outline(labeled_image)
-        outline_size_excluded_image = centrosome.outline.outline(
-            size_excluded_labeled_image
-        )
-        outline_border_excluded_image = centrosome.outline.outline(
-            border_excluded_labeled_image
-        )
-
-        if self.show_window:
+        if show_window:
             statistics = workspace.display_data.statistics
             statistics.append(["# of accepted objects", "%d" % object_count])
             if object_count > 0:
-                areas = scipy.ndimage.sum(
-                    numpy.ones(labeled_image.shape),
-                    labeled_image,
-                    numpy.arange(1, object_count + 1),
-                )
+                # One bincount pass gives the per-object area vector
+                areas = numpy.bincount(
+                    labeled_image.ravel(), minlength=object_count + 1
+                )[1:].astype(float)
                 areas.sort()
                 low_diameter = (
                     math.sqrt(float(areas[object_count // 10]) / numpy.pi) * 2
@@ -1230,14 +1285,38 @@ If "*{NO}*" is selected, the following settings are used:
             )
         )
 
-        def fgaussian(image):
-            output = scipy.ndimage.convolve1d(image, f, axis=0, mode="constant")
-            return scipy.ndimage.convolve1d(output, f, axis=1, mode="constant")
+        if len(f) > 32:
+            # For long kernels the FFT convolution is cheaper than the
+            # spatial one. The kernel is symmetric and odd-length, so
+            # "same" zero-padded fftconvolve matches convolve1d exactly.
+            def fgaussian(image):
+                output = scipy.signal.fftconvolve(
+                    image, f[:, numpy.newaxis], mode="same"
+                )
+                return scipy.signal.fftconvolve(
+                    output, f[numpy.newaxis, :], mode="same"
+                )
+
+        else:
+
+            def fgaussian(image):
+                output = scipy.ndimage.convolve1d(image, f, axis=0, mode="constant")
+                return scipy.ndimage.convolve1d(output, f, axis=1, mode="constant")
 
         #
         # Use the trick where you similarly convolve an array of ones to find
         # out the edge effects, then divide to correct the edge effects
         #
+        if mask.all():
+            # With nothing masked the zeroing and per-pixel selection below
+            # are no-ops, and the edge-correction array depends only on the
+            # image shape and the filter, so it can be reused across cycles.
+            cache_key = (image.shape, sigma, filter_size)
+            cached = getattr(self, "_edge_correction_cache", None)
+            if cached is None or cached[0] != cache_key:
+                cached = (cache_key, fgaussian(numpy.ones(image.shape)))
+                self._edge_correction_cache = cached
+            return fgaussian(image) / cached[1]
         edge_array = fgaussian(mask.astype(float))
         masked_image = image.copy()
         masked_image[~mask] = 0
@@ -1257,9 +1336,13 @@ If "*{NO}*" is selected, the following settings are used:
         returns revised labeled_image, object count, maxima_suppression_size,
         LoG threshold and filter diameter
         """
-        if self.advanced and (
-            self.unclump_method == UN_NONE or self.watershed_method == WA_NONE
-        ):
+        # Read the branching settings once - each access re-parses the
+        # stored text
+        basic = self.basic
+        unclump_method = self.unclump_method.value
+        watershed_method = self.watershed_method.value
+
+        if not basic and (unclump_method == UN_NONE or watershed_method == WA_NONE):
             return labeled_image, object_count, 7
 
         cpimage = workspace.image_set.get_image(
@@ -1269,9 +1352,9 @@ If "*{NO}*" is selected, the following settings are used:
         mask = cpimage.mask
 
         blurred_image = self.smooth_image(image, mask)
-        if self.size_range.min > 10 and (self.basic or self.low_res_maxima.value):
+        if self.size_range.min > 10 and (basic or self.low_res_maxima.value):
             image_resize_factor = 10.0 / float(self.size_range.min)
-            if self.basic or self.automatic_suppression.value:
+            if basic or self.automatic_suppression.value:
                 maxima_suppression_size = 7
             else:
                 maxima_suppression_size = (
@@ -1282,21 +1365,19 @@ If "*{NO}*" is selected, the following settings are used:
             )
         else:
             image_resize_factor = 1.0
-            if self.basic or self.automatic_suppression.value:
+            if basic or self.automatic_suppression.value:
                 maxima_suppression_size = self.size_range.min / 1.5
             else:
                 maxima_suppression_size = self.maxima_suppression_size.value
             reported_maxima_suppression_size = maxima_suppression_size
-        maxima_mask = centrosome.cpmorphology.strel_disk(
-            max(1, maxima_suppression_size - 0.5)
-        )
+        maxima_mask = strel_disk(max(1, maxima_suppression_size - 0.5))
         distance_transformed_image = None
-        if self.basic or self.unclump_method == UN_INTENSITY:
+        if basic or unclump_method == UN_INTENSITY:
             # Remove dim maxima
             maxima_image = self.get_maxima(
                 blurred_image, labeled_image, maxima_mask, image_resize_factor
             )
-        elif self.unclump_method == UN_SHAPE:
+        elif unclump_method == UN_SHAPE:
             if self.fill_holes == FH_NEVER:
                 # For shape, even if the user doesn't want to fill holes,
                 # a point far away from the edge might be near a hole.
@@ -1306,9 +1387,7 @@ If "*{NO}*" is selected, the following settings are used:
                 )
             else:
                 foreground = labeled_image > 0
-            distance_transformed_image = scipy.ndimage.distance_transform_edt(
-                foreground
-            )
+            distance_transformed_image = distance_transform(foreground)
             # randomize the distance slightly to get unique maxima
             numpy.random.seed(0)
             distance_transformed_image += numpy.random.uniform(
@@ -1322,26 +1401,24 @@ If "*{NO}*" is selected, the following settings are used:
             )
         else:
             raise ValueError(
-                "Unsupported local maxima method: %s" % self.unclump_method.value
+                "Unsupported local maxima method: %s" % unclump_method
             )
 
         # Create the image for watershed
-        if self.basic or self.watershed_method == WA_INTENSITY:
+        if basic or watershed_method == WA_INTENSITY:
             # use the reverse of the image to get valleys at peaks
             watershed_image = 1 - image
-        elif self.watershed_method == WA_SHAPE:
+        elif watershed_method == WA_SHAPE:
             if distance_transformed_image is None:
-                distance_transformed_image = scipy.ndimage.distance_transform_edt(
-                    labeled_image > 0
-                )
+                distance_transformed_image = distance_transform(labeled_image > 0)
             watershed_image = -distance_transformed_image
             watershed_image = watershed_image - numpy.min(watershed_image)
-        elif self.watershed_method == WA_PROPAGATE:
+        elif watershed_method == WA_PROPAGATE:
             # No image used
             pass
         else:
             raise NotImplementedError(
-                "Watershed method %s is not implemented" % self.watershed_method.value
+                "Watershed method %s is not implemented" % watershed_method
             )
         #
         # Create a marker array where the unlabeled image has a label of
@@ -1352,9 +1429,9 @@ If "*{NO}*" is selected, the following settings are used:
         # yields fair boundaries when markers compete for pixels.
         #
         self.labeled_maxima, object_count = scipy.ndimage.label(
-            maxima_image, numpy.ones((3, 3), bool)
+            maxima_image, EIGHT_CONNECT
         )
-        if self.advanced and self.watershed_method == WA_PROPAGATE:
+        if not basic and watershed_method == WA_PROPAGATE:
             watershed_boundaries, distance = centrosome.propagate.propagate(
                 numpy.zeros(self.labeled_maxima.shape),
                 self.labeled_maxima,
@@ -1368,23 +1445,22 @@ If "*{NO}*" is selected, the following settings are used:
                 else numpy.int32
             )
             markers = numpy.zeros(watershed_image.shape, markers_dtype)
-            markers[self.labeled_maxima > 0] = -self.labeled_maxima[
-                self.labeled_maxima > 0
-            ]
+            is_maximum = self.labeled_maxima > 0
+            markers[is_maximum] = -self.labeled_maxima[is_maximum]
 
             #
             # Some labels have only one maker in them, some have multiple and
             # will be split up.
             #
 
-            watershed_boundaries = skimage.morphology.watershed(
-                connectivity=numpy.ones((3, 3), bool),
+            watershed_boundaries = watershed(
+                connectivity=EIGHT_CONNECT,
                 image=watershed_image,
                 markers=markers,
                 mask=labeled_image != 0,
             )
 
-            watershed_boundaries = -watershed_boundaries
+            numpy.negative(watershed_boundaries, out=watershed_boundaries)
 
         return watershed_boundaries, object_count, reported_maxima_suppression_size
 
@@ -1417,16 +1493,21 @@ If "*{NO}*" is selected, the following settings are used:
             inverse_resize_factor = float(image.shape[0]) / float(
                 binary_maxima_image.shape[0]
             )
-            i_j = (
-                numpy.mgrid[0 : image.shape[0], 0 : image.shape[1]].astype(float)
-                / inverse_resize_factor
-            )
-            binary_maxima_image = (
-                scipy.ndimage.map_coordinates(binary_maxima_image.astype(float), i_j)
-                > 0.5
-            )
-            assert binary_maxima_image.shape[0] == image.shape[0]
-            assert binary_maxima_image.shape[1] == image.shape[1]
+            #
+            # Scale the maxima coordinates back up to the full-size image
+            # instead of interpolating the binary image - each low-res
+            # maximum becomes a single full-resolution seed pixel
+            #
+            i, j = numpy.nonzero(binary_maxima_image)
+            binary_maxima_image = numpy.zeros(image.shape, bool)
+            binary_maxima_image[
+                numpy.minimum(
+                    (i * inverse_resize_factor).astype(int), image.shape[0] - 1
+                ),
+                numpy.minimum(
+                    (j * inverse_resize_factor).astype(int), image.shape[1] - 1
+                ),
+            ] = True
 
         # Erode blobs of touching maxima to a single point
 
@@ -1442,25 +1523,27 @@ If "*{NO}*" is selected, the following settings are used:
         small objects removed
         """
         if self.exclude_size.value and object_count > 0:
-            areas = scipy.ndimage.measurements.sum(
-                numpy.ones(labeled_image.shape),
-                labeled_image,
-                numpy.array(list(range(0, object_count + 1)), dtype=numpy.int32),
-            )
-            areas = numpy.array(areas, dtype=int)
+            # A single bincount pass gives every object's area without
+            # allocating an image of ones or reducing per label
+            areas = numpy.bincount(labeled_image.ravel(), minlength=object_count + 1)
             min_allowed_area = (
                 numpy.pi * (self.size_range.min * self.size_range.min) / 4
             )
             max_allowed_area = (
                 numpy.pi * (self.size_range.max * self.size_range.max) / 4
             )
-            # area_image has the area of the object at every pixel within the object
-            area_image = areas[labeled_image]
-            labeled_image[area_image < min_allowed_area] = 0
+            # Boolean per-label lookups mark the out-of-range objects;
+            # indexing by the label image spreads the verdict per pixel
+            # without materializing a full-size area image
+            too_small = areas < min_allowed_area
+            labeled_image[too_small[labeled_image]] = 0
             small_removed_labels = labeled_image.copy()
-            labeled_image[area_image > max_allowed_area] = 0
+            too_large = areas > max_allowed_area
+            labeled_image[too_large[labeled_image]] = 0
         else:
-            small_removed_labels = labeled_image.copy()
+            # Nothing is filtered, so the small-removed set is the input
+            # set; downstream only reads these label matrices
+            small_removed_labels = labeled_image
         return labeled_image, small_removed_labels
 
     def filter_on_border(self, image, labeled_image):
@@ -1470,23 +1553,21 @@ If "*{NO}*" is selected, the following settings are used:
         touching the border of the mask.
         """
         if self.exclude_border_objects.value:
-            border_labels = list(labeled_image[0, :])
-            border_labels.extend(labeled_image[:, 0])
-            border_labels.extend(labeled_image[labeled_image.shape[0] - 1, :])
-            border_labels.extend(labeled_image[:, labeled_image.shape[1] - 1])
-            border_labels = numpy.array(border_labels)
+            border_labels = numpy.concatenate(
+                (
+                    labeled_image[0, :],
+                    labeled_image[:, 0],
+                    labeled_image[labeled_image.shape[0] - 1, :],
+                    labeled_image[:, labeled_image.shape[1] - 1],
+                )
+            )
             #
             # the following histogram has a value > 0 for any object
             # with a border pixel
             #
-            histogram = scipy.sparse.coo_matrix(
-                (
-                    numpy.ones(border_labels.shape),
-                    (border_labels, numpy.zeros(border_labels.shape)),
-                ),
-                shape=(numpy.max(labeled_image) + 1, 1),
-            ).todense()
-            histogram = numpy.array(histogram).flatten()
+            histogram = numpy.bincount(
+                border_labels, minlength=numpy.max(labeled_image) + 1
+            )
             if any(histogram[1:] > 0):
                 histogram_image = histogram[labeled_image]
                 labeled_image[histogram_image > 0] = 0
@@ -1502,16 +1583,10 @@ If "*{NO}*" is selected, the following settings are used:
                     scipy.ndimage.binary_erosion(image.mask)
                 )
                 mask_border = numpy.logical_and(mask_border, image.mask)
-                border_labels = labeled_image[mask_border]
-                border_labels = border_labels.flatten()
-                histogram = scipy.sparse.coo_matrix(
-                    (
-                        numpy.ones(border_labels.shape),
-                        (border_labels, numpy.zeros(border_labels.shape)),
-                    ),
-                    shape=(numpy.max(labeled_image) + 1, 1),
-                ).todense()
-                histogram = numpy.array(histogram).flatten()
+                border_labels = labeled_image[mask_border].flatten()
+                histogram = numpy.bincount(
+                    border_labels, minlength=numpy.max(labeled_image) + 1
+                )
                 if any(histogram[1:] > 0):
                     histogram_image = histogram[labeled_image]
                     labeled_image[histogram_image > 0] = 0
@@ -6,6 +6,11 @@ import numpy
 import scipy.ndimage
 import skimage.morphology
 
+try:
+    from skimage.segmentation import watershed
+except ImportError:  # watershed lived in skimage.morphology before scikit-image 0.17
+    from skimage.morphology import watershed
+
 import cellprofiler_core.image
 import cellprofiler_core.measurement
 import cellprofiler_core.module
@@ -624,7 +629,7 @@ segmentation.""",
             # Perform the first watershed
             #
 
-            labels_out = skimage.morphology.watershed(
+            labels_out = watershed(
                 connectivity=numpy.ones((3, 3), bool),
                 image=sobel_image,
                 markers=labels_in,
@@ -656,7 +661,7 @@ segmentation.""",
             # Perform the watershed
             #
 
-            labels_out = skimage.morphology.watershed(
+            labels_out = watershed(
                 connectivity=numpy.ones((3, 3), bool),
                 image=inverted_img,
                 markers=labels_in,
@@ -681,7 +686,7 @@ segmentation.""",
             lookup = scipy.ndimage.maximum(
                 segmented_out,
                 objects.segmented,
-                list(range(numpy.max(objects.segmented) + 1)),
+                numpy.arange(numpy.max(objects.segmented) + 1),
             )
             lookup = centrosome.cpmorphology.fixup_scipy_ndimage_result(lookup)
             lookup[0] = 0
@@ -884,7 +889,7 @@ segmentation.""",
             )
             segmented_labels[~m1] = 0
             lookup = scipy.ndimage.maximum(
-                segmented_labels, labels_out, list(range(max_out + 1))
+                segmented_labels, labels_out, numpy.arange(max_out + 1)
             )
             lookup = numpy.array(lookup, int)
             lookup[0] = 0
@@ -198,7 +198,7 @@ Select the previously identified objects you would like to measure.""".format(
     def _add_image_measurement(self, name, feature_name, features, measurements):
         measurements.add_image_measurement(
             "{:s}_{:s}_{:s}".format(C_AREA_OCCUPIED, feature_name, name),
-            numpy.array([features], dtype=float),
+            float(features),
         )
 
     def measure_objects(self, object_set, workspace):
@@ -204,6 +204,86 @@ SETTINGS_PER_GROUP_V3 = 11
 IMAGE_GROUP_SETTING_OFFSET = 2
 
 
+def _mog_threshold(pixel_data, mask, object_fraction, nbins=256):
+    """Two-class mixture-of-Gaussians threshold from a binned histogram
+
+    pixel_data - grayscale intensities
+
+    mask - boolean mask of pixels to consider, or None for all of them
+
+    object_fraction - expected fraction of foreground pixels, used both
+                      to initialize the class means and as the starting
+                      mixing weights
+
+    The EM iteration runs over the intensity histogram rather than the
+    raw pixels, so each step costs O(nbins) regardless of image size.
+    The threshold is the intensity between the two class means where
+    the weighted foreground density overtakes the background density.
+    """
+    data = pixel_data[mask] if mask is not None else pixel_data.ravel()
+    data = data[~numpy.isnan(data)]
+    if len(data) == 0:
+        return 1.0
+    lo, hi = float(numpy.min(data)), float(numpy.max(data))
+    if lo == hi:
+        return lo
+    counts = numpy.histogram(data, bins=nbins, range=(lo, hi))[0]
+    bin_width = (hi - lo) / nbins
+    bin_centers = lo + bin_width * (numpy.arange(nbins) + 0.5)
+    p = counts.astype(float) / numpy.sum(counts)
+    cdf = numpy.cumsum(p)
+    w_fg = min(max(object_fraction, 0.01), 0.99)
+    w_bg = 1.0 - w_fg
+    #
+    # Start the means at the midpoints of the mass each class should own
+    #
+    mu_bg = bin_centers[numpy.searchsorted(cdf, w_bg * 0.5)]
+    mu_fg = bin_centers[min(numpy.searchsorted(cdf, 1.0 - w_fg * 0.5), nbins - 1)]
+    sigma_bg = sigma_fg = max((hi - lo) / 6.0, bin_width)
+    threshold = None
+    for _ in range(100):
+        d_bg = (
+            w_bg
+            * numpy.exp(-((bin_centers - mu_bg) ** 2) / (2.0 * sigma_bg ** 2))
+            / sigma_bg
+        )
+        d_fg = (
+            w_fg
+            * numpy.exp(-((bin_centers - mu_fg) ** 2) / (2.0 * sigma_fg ** 2))
+            / sigma_fg
+        )
+        r_bg = d_bg / numpy.maximum(d_bg + d_fg, numpy.finfo(float).eps)
+        w_bg = numpy.sum(r_bg * p)
+        w_fg = 1.0 - w_bg
+        if w_bg == 0.0 or w_fg == 0.0:
+            break
+        mu_bg = numpy.sum(r_bg * p * bin_centers) / w_bg
+        mu_fg = numpy.sum((1.0 - r_bg) * p * bin_centers) / w_fg
+        sigma_bg = max(
+            numpy.sqrt(numpy.sum(r_bg * p * (bin_centers - mu_bg) ** 2) / w_bg),
+            bin_width,
+        )
+        sigma_fg = max(
+            numpy.sqrt(
+                numpy.sum((1.0 - r_bg) * p * (bin_centers - mu_fg) ** 2) / w_fg
+            ),
+            bin_width,
+        )
+        between = (bin_centers >= min(mu_bg, mu_fg)) & (
+            bin_centers <= max(mu_bg, mu_fg)
+        )
+        crossings = numpy.flatnonzero(between & (d_fg >= d_bg))
+        if len(crossings) > 0:
+            new_threshold = bin_centers[crossings[0]]
+        else:
+            new_threshold = (mu_bg + mu_fg) / 2.0
+        if threshold is not None and abs(new_threshold - threshold) < bin_width:
+            threshold = new_threshold
+            break
+        threshold = new_threshold
+    return threshold
+
+
 class MeasureImageQuality(cellprofiler_core.module.Module):
     module_name = "MeasureImageQuality"
     category = "Measurement"
@@ -1139,18 +1219,22 @@ to the foreground pixels or the background pixels.
             if image.has_mask:
                 pixel_data = pixel_data[image.mask]
 
+            #
+            # The image-wide focus score does not depend on the window
+            # scale, so compute it once instead of once per scale
+            #
+            focus_score = 0
+            if len(pixel_data):
+                mean_image_value = numpy.mean(pixel_data)
+                squared_normalized_image = (pixel_data - mean_image_value) ** 2
+                if mean_image_value > 0:
+                    focus_score = numpy.sum(squared_normalized_image) / (
+                        numpy.product(pixel_data.shape) * mean_image_value
+                    )
+
             local_focus_score = []
             for scale_group in image_group.scale_groups:
                 scale = scale_group.scale.value
-
-                focus_score = 0
-                if len(pixel_data):
-                    mean_image_value = numpy.mean(pixel_data)
-                    squared_normalized_image = (pixel_data - mean_image_value) ** 2
-                    if mean_image_value > 0:
-                        focus_score = numpy.sum(squared_normalized_image) / (
-                            numpy.product(pixel_data.shape) * mean_image_value
-                        )
                 #
                 # Create a labels matrix that grids the image to the dimensions
                 # of the window size
@@ -1202,9 +1286,11 @@ to the foreground pixels or the background pixels.
                             local_squared_normalized_image, grid, nz_grid_range
                         )
                     )
-                    pixel_counts = centrosome.cpmorphology.fixup_scipy_ndimage_result(
-                        scipy.ndimage.sum(numpy.ones(shape), grid, nz_grid_range)
-                    )
+                    # A bincount of the grid labels gives the per-window
+                    # pixel counts without allocating an image of ones
+                    pixel_counts = numpy.bincount(
+                        grid.ravel(), minlength=len(grid_range)
+                    )[nz_grid_range].astype(float)
                     local_norm_var = sums / (pixel_counts * local_means[grid_mask])
                     local_norm_median = numpy.median(local_norm_var)
                     if numpy.isfinite(local_norm_median) and local_norm_median > 0:
@@ -1477,28 +1563,39 @@ to the foreground pixels or the background pixels.
                     threshold_group.assign_middle_to_foreground.value
                     == identify.O_FOREGROUND
                 )
-                (local_threshold, global_threshold) = (
-                    centrosome.threshold.get_threshold(
-                        threshold_method,
-                        centrosome.threshold.TM_GLOBAL,
+                if threshold_method == centrosome.threshold.TM_MOG:
+                    # The EM fit runs over the intensity histogram, so
+                    # its cost is independent of the image size
+                    global_threshold = _mog_threshold(
                         pixel_data,
-                        mask=image.mask,
-                        object_fraction=object_fraction,
-                        two_class_otsu=two_class_otsu,
-                        use_weighted_variance=use_weighted_variance,
-                        assign_middle_to_foreground=assign_middle_to_foreground,
+                        image.mask if image.has_mask else None,
+                        object_fraction,
                     )
-                    if image.has_mask
-                    else centrosome.threshold.get_threshold(
-                        threshold_method,
-                        centrosome.threshold.TM_GLOBAL,
-                        pixel_data,
-                        object_fraction=object_fraction,
-                        two_class_otsu=two_class_otsu,
-                        use_weighted_variance=use_weighted_variance,
-                        assign_middle_to_foreground=assign_middle_to_foreground,
+                elif image.has_mask:
+                    (local_threshold, global_threshold) = (
+                        centrosome.threshold.get_threshold(
+                            threshold_method,
+                            centrosome.threshold.TM_GLOBAL,
+                            pixel_data,
+                            mask=image.mask,
+                            object_fraction=object_fraction,
+                            two_class_otsu=two_class_otsu,
+                            use_weighted_variance=use_weighted_variance,
+                            assign_middle_to_foreground=assign_middle_to_foreground,
+                        )
+                    )
+                else:
+                    (local_threshold, global_threshold) = (
+                        centrosome.threshold.get_threshold(
+                            threshold_method,
+                            centrosome.threshold.TM_GLOBAL,
+                            pixel_data,
+                            object_fraction=object_fraction,
+                            two_class_otsu=two_class_otsu,
+                            use_weighted_variance=use_weighted_variance,
+                            assign_middle_to_foreground=assign_middle_to_foreground,
+                        )
                     )
-                )
 
                 scale = threshold_group.threshold_scale
                 if scale is None:
@@ -71,10 +71,11 @@ import scipy.ndimage as scind
 import scipy.signal
 import skimage.morphology
 from centrosome.cpmorphology import fixup_scipy_ndimage_result as fix
-from centrosome.cpmorphology import strel_disk, centers_of_labels
+from centrosome.cpmorphology import strel_disk
 from centrosome.outline import outline
 
 import cellprofiler_core.image as cpi
+from cellprofiler.utilities.morphology import centers_of_labels
 import cellprofiler_core.measurement as cpmeas
 import cellprofiler_core.module as cpm
 import cellprofiler_core.object as cpo
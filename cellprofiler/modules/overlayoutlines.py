@@ -249,9 +249,12 @@ maximal brightness already occurring in the image.
         base_image, dimensions = self.base_image(workspace)
 
         if self.wants_color.value == WANTS_COLOR:
+            if base_image.ndim == dimensions:
+                base_image = skimage.color.gray2rgb(base_image)
+
             pixel_data = self.run_color(workspace, base_image.copy())
         else:
-            pixel_data = self.run_bw(workspace, base_image)
+            pixel_data = self.run_bw(workspace, base_image, dimensions)
 
         output_image = cellprofiler_core.image.Image(pixel_data, dimensions=dimensions)
 
@@ -319,29 +322,37 @@ maximal brightness already occurring in the image.
 
             objects = workspace.object_set.get_objects(outline.objects_name.value)
 
-            return numpy.zeros(objects.shape + (3,)), objects.dimensions
+            shape = objects.shape
 
-        image = workspace.image_set.get_image(self.image_name.value)
+            if self.wants_color.value == WANTS_COLOR:
+                shape = shape + (3,)
 
-        pixel_data = skimage.img_as_float(image.pixel_data)
+            return numpy.zeros(shape), objects.dimensions
 
-        if image.multichannel:
-            return pixel_data, image.dimensions
+        image = workspace.image_set.get_image(self.image_name.value)
 
-        return skimage.color.gray2rgb(pixel_data), image.dimensions
+        return skimage.img_as_float(image.pixel_data), image.dimensions
 
-    def run_bw(self, workspace, pixel_data):
+    def run_bw(self, workspace, pixel_data, dimensions):
         if self.blank_image.value or self.max_type.value == MAX_POSSIBLE:
             color = 1.0
         else:
             color = numpy.max(pixel_data)
 
+        # Collapse multichannel input once up front; outlines are then
+        # painted directly on the grayscale image instead of marking an
+        # RGB-expanded copy and converting it back afterward.
+        if pixel_data.ndim > dimensions:
+            pixel_data = skimage.color.rgb2gray(pixel_data)
+        else:
+            pixel_data = pixel_data.copy()
+
         for outline in self.outlines:
             objects = workspace.object_set.get_objects(outline.objects_name.value)
 
             pixel_data = self.draw_outlines(pixel_data, objects, color)
 
-        return skimage.color.rgb2gray(pixel_data)
+        return pixel_data
 
     def run_color(self, workspace, pixel_data):
         for outline in self.outlines:
@@ -354,23 +365,32 @@ maximal brightness already occurring in the image.
         return pixel_data
 
     def draw_outlines(self, pixel_data, objects, color):
+        mode = self.line_mode.value.lower()
+
         for labels, _ in objects.get_labels():
             resized_labels = self.resize(pixel_data, labels)
 
-            if objects.volumetric:
+            if pixel_data.ndim == resized_labels.ndim:
+                # Grayscale: assign the outline value in place, one
+                # find_boundaries pass per plane, same as the boundaries
+                # mark_boundaries would have drawn.
+                if objects.volumetric:
+                    for index, plane in enumerate(resized_labels):
+                        pixel_data[index][
+                            skimage.segmentation.find_boundaries(plane, mode=mode)
+                        ] = color
+                else:
+                    pixel_data[
+                        skimage.segmentation.find_boundaries(resized_labels, mode=mode)
+                    ] = color
+            elif objects.volumetric:
                 for index, plane in enumerate(resized_labels):
                     pixel_data[index] = skimage.segmentation.mark_boundaries(
-                        pixel_data[index],
-                        plane,
-                        color=color,
-                        mode=self.line_mode.value.lower(),
+                        pixel_data[index], plane, color=color, mode=mode,
                     )
             else:
                 pixel_data = skimage.segmentation.mark_boundaries(
-                    pixel_data,
-                    resized_labels,
-                    color=color,
-                    mode=self.line_mode.value.lower(),
+                    pixel_data, resized_labels, color=color, mode=mode,
                 )
 
         return pixel_data
@@ -10,6 +10,7 @@ import cellprofiler_core.object as cpo
 import cellprofiler_core.setting as cps
 from cellprofiler_core.measurement import C_PARENT, FF_CHILDREN_COUNT, FF_PARENT
 from cellprofiler.modules import _help
+from cellprofiler.utilities.morphology import centers_of_labels
 from cellprofiler_core.modules.identify import add_object_count_measurements
 from cellprofiler_core.modules.identify import add_object_location_measurements
 from cellprofiler_core.modules.identify import get_object_measurement_columns
@@ -565,7 +566,7 @@ above):
             #
             # Only connect points > minimum intensity fraction
             #
-            center_i, center_j = morph.centers_of_labels(labels)
+            center_i, center_j = centers_of_labels(labels)
             indexes, counts, i, j = morph.get_line_pts(
                 center_i[c_i - 1],
                 center_j[c_i - 1],
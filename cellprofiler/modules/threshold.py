@@ -44,6 +44,17 @@ RB_MODE = "Mode"
 RB_SD = "Standard deviation"
 RB_MAD = "Median absolute deviation"
 
+# Resolved once - robust background runs per block in adaptive mode
+RB_AVERAGE_FNS = {
+    RB_MEAN: numpy.mean,
+    RB_MEDIAN: numpy.median,
+    RB_MODE: centrosome.threshold.binned_mode,
+}
+RB_VARIANCE_FNS = {
+    RB_SD: numpy.std,
+    RB_MAD: centrosome.threshold.mad,
+}
+
 TS_GLOBAL = "Global"
 TS_ADAPTIVE = "Adaptive"
 TM_MANUAL = "Manual"
@@ -61,6 +72,67 @@ PROTIP_AVOID_ICON = "thumb-down.png"
 TECH_NOTE_ICON = "gear.png"
 
 
+def _otsu_from_histogram(counts, bin_centers):
+    """Find the Otsu threshold from a precomputed intensity histogram
+
+    counts - pixel counts per histogram bin
+
+    bin_centers - intensity value at the center of each bin
+
+    Maximizes the between-class variance over all candidate thresholds
+    using cumulative sums, so the search is a handful of vector operations
+    over the histogram instead of a pass over the pixel data per candidate.
+    The arithmetic mirrors skimage.filters.threshold_otsu so results agree
+    with the pixel-based implementation.
+
+    The first and last bins must be non-empty, which is guaranteed for a
+    histogram taken over the data's own range.
+    """
+    counts = counts.astype(float)
+    weight_1 = numpy.cumsum(counts)
+    weight_2 = numpy.cumsum(counts[::-1])[::-1]
+    # Class means for every candidate threshold
+    mean_1 = numpy.cumsum(counts * bin_centers) / weight_1
+    mean_2 = (numpy.cumsum((counts * bin_centers)[::-1]) / weight_2[::-1])[::-1]
+    # The last bin can never be a threshold, so exclude it from the search
+    variance_12 = weight_1[:-1] * weight_2[1:] * (mean_1[:-1] - mean_2[1:]) ** 2
+    return bin_centers[:-1][numpy.argmax(variance_12)]
+
+
+def _multiotsu_from_histogram(counts, bin_centers):
+    """Find the two three-class Otsu thresholds from a precomputed histogram
+
+    counts - pixel counts per histogram bin
+
+    bin_centers - intensity value at the center of each bin
+
+    Evaluates the between-class variance of every pair of candidate
+    thresholds at once from cumulative sums over the histogram, replacing
+    the per-candidate scan over the pixel data. At least three bins must
+    be occupied for the pair to be meaningful.
+    """
+    p = counts.astype(float) / counts.sum()
+    weights = numpy.cumsum(p)
+    means = numpy.cumsum(p * bin_centers)
+    total_mean = means[-1]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        s_low = means ** 2 / weights
+        s_high = (total_mean - means) ** 2 / (1.0 - weights)
+        w_mid = weights[numpy.newaxis, :] - weights[:, numpy.newaxis]
+        m_mid = means[numpy.newaxis, :] - means[:, numpy.newaxis]
+        variance = (
+            s_low[:, numpy.newaxis]
+            + m_mid ** 2 / w_mid
+            + s_high[numpy.newaxis, :]
+        )
+    # Rule out empty classes and pairs where the lower threshold is not
+    # strictly below the upper one
+    variance[~numpy.isfinite(variance)] = -numpy.inf
+    variance[numpy.tril_indices_from(variance)] = -numpy.inf
+    lower, upper = numpy.unravel_index(numpy.argmax(variance), variance.shape)
+    return bin_centers[[lower, upper]]
+
+
 class Threshold(cellprofiler_core.module.ImageProcessing):
     module_name = "Threshold"
 
@@ -797,7 +869,9 @@ Often a good choice is some multiple of the largest expected object size.
         mask = image.mask
 
         if not automatic and self.threshold_smoothing_scale.value == 0:
-            return (data >= threshold) & mask, 0
+            binary_image = numpy.greater_equal(data, threshold)
+            numpy.logical_and(binary_image, mask, out=binary_image)
+            return binary_image, 0
 
         if automatic:
             sigma = 1
@@ -814,13 +888,19 @@ Often a good choice is some multiple of the largest expected object size.
             mask,
         )
 
-        return (blurred_image >= threshold) & mask, sigma
+        binary_image = numpy.greater_equal(blurred_image, threshold)
+        numpy.logical_and(binary_image, mask, out=binary_image)
+
+        return binary_image, sigma
 
     def get_threshold(self, image, workspace, automatic=False):
-        if self.threshold_operation == TM_MANUAL:
+        # Snapshot the operation once; the property re-reads the scope and
+        # method settings on every access
+        operation = self.threshold_operation
+        if operation == TM_MANUAL:
             return self.manual_threshold.value, self.manual_threshold.value, None
 
-        elif self.threshold_operation == TM_MEASUREMENT:
+        elif operation == TM_MEASUREMENT:
             # Thresholds are stored as single element arrays.  Cast to float to extract the value.
             orig_threshold = float(
                 workspace.measurements.get_current_image_measurement(self.thresholding_measurement.value)
@@ -837,26 +917,42 @@ Often a good choice is some multiple of the largest expected object size.
             raise ValueError("Invalid thresholding settings")
 
     def get_global_threshold(self, image, automatic=False):
-        image_data = image.pixel_data[image.mask]
+        operation = self.threshold_operation
+        if image.mask.all():
+            # Masking with an all-True mask would copy the pixel data;
+            # every consumer below treats the array as read-only, so a
+            # flat view is enough
+            image_data = image.pixel_data.ravel()
+        else:
+            image_data = image.pixel_data[image.mask]
+
+        # The intensity extrema double as the all-equal shortcut and as
+        # the histogram range below, replacing a full comparison pass
+        if len(image_data) > 0:
+            lo, hi = image_data.min(), image_data.max()
 
         # Shortcuts - Check if image array is empty or all pixels are the same value.
         if len(image_data) == 0:
             threshold = 0.0
 
-        elif numpy.all(image_data == image_data[0]):
-            threshold = image_data[0]
+        elif lo == hi:
+            threshold = lo
 
-        elif automatic or self.threshold_operation in (TM_LI, TM_SAUVOLA):
+        elif automatic or operation in (TM_LI, TM_SAUVOLA):
             threshold = skimage.filters.threshold_li(image_data)
             if automatic:
                 return threshold, threshold, None
 
-        elif self.threshold_operation == TM_ROBUST_BACKGROUND:
+        elif operation == TM_ROBUST_BACKGROUND:
             threshold = self.get_threshold_robust_background(image_data)
 
-        elif self.threshold_operation == TM_OTSU:
+        elif operation == TM_OTSU:
             if self.two_class_otsu.value == O_TWO_CLASS:
-                threshold = skimage.filters.threshold_otsu(image_data)
+                counts, bin_edges = numpy.histogram(
+                    image_data, bins=256, range=(lo, hi)
+                )
+                bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+                threshold = _otsu_from_histogram(counts, bin_centers)
             elif self.two_class_otsu.value == O_THREE_CLASS:
                 bin_wanted = 0 if self.assign_middle_to_foreground.value == "Foreground" else 1
                 threshold = skimage.filters.threshold_multiotsu(image_data, nbins=128)
@@ -866,6 +962,7 @@ Often a good choice is some multiple of the largest expected object size.
         return self._correct_global_threshold(threshold), threshold, None
 
     def get_local_threshold(self, image):
+        operation = self.threshold_operation
         guide_threshold, _, _ = self.get_global_threshold(image)
         image_data = numpy.where(image.mask, image.pixel_data, numpy.nan)
 
@@ -875,32 +972,7 @@ Often a good choice is some multiple of the largest expected object size.
         elif numpy.all(image_data == image_data[0]):
             local_threshold = numpy.full_like(image_data, image_data[0])
 
-        elif self.threshold_operation == TM_LI:
-            local_threshold = self._run_local_threshold(image_data,
-                                                        method=skimage.filters.threshold_li,
-                                                        volumetric=image.volumetric,
-                                                        )
-        elif self.threshold_operation == TM_OTSU:
-            if self.two_class_otsu.value == O_TWO_CLASS:
-                local_threshold = self._run_local_threshold(image_data,
-                                                            method=skimage.filters.threshold_otsu,
-                                                            volumetric=image.volumetric,
-                                                            )
-
-            elif self.two_class_otsu.value == O_THREE_CLASS:
-                local_threshold = self._run_local_threshold(image_data,
-                                                            method=skimage.filters.threshold_multiotsu,
-                                                            volumetric=image.volumetric,
-                                                            nbins=128,
-                                                            )
-
-        elif self.threshold_operation == TM_ROBUST_BACKGROUND:
-            local_threshold = self._run_local_threshold(image_data,
-                                                        method=self.get_threshold_robust_background,
-                                                        volumetric=image.volumetric,
-                                                        )
-
-        elif self.threshold_operation == TM_SAUVOLA:
+        elif operation == TM_SAUVOLA:
             image_data = numpy.where(image.mask, image.pixel_data, 0)
             adaptive_window = self.adaptive_window_size.value
             if adaptive_window % 2 == 0:
@@ -909,9 +981,34 @@ Often a good choice is some multiple of the largest expected object size.
                                                                 window_size=adaptive_window)
 
         else:
-            raise ValueError("Invalid thresholding settings")
+            method, method_kwargs = self._local_threshold_method(operation)
+            local_threshold = self._run_local_threshold(image_data,
+                                                        method=method,
+                                                        volumetric=image.volumetric,
+                                                        **method_kwargs
+                                                        )
         return self._correct_local_threshold(local_threshold, guide_threshold), local_threshold, guide_threshold
 
+    def _local_threshold_method(self, operation):
+        """Resolve the local thresholding callable and its keyword arguments
+
+        The settings lookups behind the dispatch run once per image here;
+        everything downstream works with the resolved callable.
+        """
+        if operation == TM_LI:
+            return skimage.filters.threshold_li, {}
+
+        if operation == TM_OTSU:
+            if self.two_class_otsu.value == O_TWO_CLASS:
+                return skimage.filters.threshold_otsu, {}
+
+            return skimage.filters.threshold_multiotsu, {"nbins": 128}
+
+        if operation == TM_ROBUST_BACKGROUND:
+            return self.get_threshold_robust_background, {}
+
+        raise ValueError("Invalid thresholding settings")
+
     def _run_local_threshold(self, image_data, method, volumetric=False, **kwargs):
         if volumetric:
             t_local = numpy.zeros_like(image_data)
@@ -953,29 +1050,47 @@ Often a good choice is some multiple of the largest expected object size.
         #
         thresh_out = numpy.zeros(image_size, image_data.dtype)
         #
-        # Loop once per block, computing the "global" threshold within the
-        # block.
+        # Compute the "global" threshold within each block. Two-class Otsu
+        # only needs a histogram per block, so those are accumulated for
+        # every block in a single binned count over the image instead of
+        # re-scanning the pixels of each block.
         #
-        block_threshold = numpy.zeros([nblocks[0], nblocks[1]])
-        for i in range(nblocks[0]):
-            i0 = int(i * increment[0])
-            i1 = int((i + 1) * increment[0])
-            for j in range(nblocks[1]):
-                j0 = int(j * increment[1])
-                j1 = int((j + 1) * increment[1])
-                block = image_data[i0:i1, j0:j1]
-                block = block[~numpy.isnan(block)]
-                if len(block) == 0:
-                    threshold_out = 0.0
-                elif numpy.all(block == block[0]):
-                    # Don't compute blocks with only 1 value.
-                    threshold_out = block[0]
-                else:
-                    threshold_out = threshold_method(block, **kwargs)
-                if isinstance(threshold_out, numpy.ndarray):
-                    # Select correct bin if running multiotsu
-                    threshold_out = threshold_out[bin_wanted]
-                block_threshold[i, j] = threshold_out
+        if threshold_method is skimage.filters.threshold_otsu and not kwargs:
+            block_threshold = self._block_otsu_thresholds(
+                image_data, nblocks, increment
+            )
+        elif threshold_method is skimage.filters.threshold_multiotsu and set(
+            kwargs
+        ) <= {"nbins"}:
+            block_threshold = self._block_otsu_thresholds(
+                image_data,
+                nblocks,
+                increment,
+                nbins=kwargs.get("nbins", 256),
+                three_class=True,
+                bin_wanted=bin_wanted,
+            )
+        else:
+            block_threshold = numpy.zeros([nblocks[0], nblocks[1]])
+            for i in range(nblocks[0]):
+                i0 = int(i * increment[0])
+                i1 = int((i + 1) * increment[0])
+                for j in range(nblocks[1]):
+                    j0 = int(j * increment[1])
+                    j1 = int((j + 1) * increment[1])
+                    block = image_data[i0:i1, j0:j1]
+                    block = block[~numpy.isnan(block)]
+                    if len(block) == 0:
+                        threshold_out = 0.0
+                    elif numpy.all(block == block[0]):
+                        # Don't compute blocks with only 1 value.
+                        threshold_out = block[0]
+                    else:
+                        threshold_out = threshold_method(block, **kwargs)
+                    if isinstance(threshold_out, numpy.ndarray):
+                        # Select correct bin if running multiotsu
+                        threshold_out = threshold_out[bin_wanted]
+                    block_threshold[i, j] = threshold_out
 
         #
         # Use a cubic spline to blend the thresholds across the image to avoid image artifacts
@@ -1010,6 +1125,89 @@ Often a good choice is some multiple of the largest expected object size.
 
         return thresh_out
 
+    def _block_otsu_thresholds(
+        self,
+        image_data,
+        nblocks,
+        increment,
+        nbins=256,
+        three_class=False,
+        bin_wanted=0,
+    ):
+        """Compute the per-block thresholds for adaptive Otsu
+
+        image_data - 2-D image data, with NaN marking masked pixels
+
+        nblocks - number of blocks in each direction
+
+        increment - floating point block size in each direction
+
+        three_class - True to run the three-class search, selecting the
+                      threshold indexed by bin_wanted for each block
+
+        The histograms of all blocks are accumulated with one binned count
+        over the image, then each block's threshold comes from the
+        vectorized histogram search, so the cost per block is proportional
+        to the number of bins rather than the block area.
+        """
+        finite = ~numpy.isnan(image_data)
+        values = image_data[finite]
+        if len(values) == 0:
+            return numpy.zeros([nblocks[0], nblocks[1]])
+        #
+        # Assign each row and column to its block, using the same rounding
+        # as the block-slicing loop
+        #
+        i_starts = (numpy.arange(1, nblocks[0]) * increment[0]).astype(int)
+        j_starts = (numpy.arange(1, nblocks[1]) * increment[1]).astype(int)
+        block_i = numpy.searchsorted(
+            i_starts, numpy.arange(image_data.shape[0]), side="right"
+        )
+        block_j = numpy.searchsorted(
+            j_starts, numpy.arange(image_data.shape[1]), side="right"
+        )
+        block_ids = block_i[:, numpy.newaxis] * nblocks[1] + block_j[numpy.newaxis, :]
+        lo, hi = values.min(), values.max()
+        if lo == hi:
+            return numpy.full([nblocks[0], nblocks[1]], lo)
+        bin_edges = numpy.linspace(lo, hi, nbins + 1)
+        # The bins are uniform, so each value's bin index comes from a
+        # single multiply instead of a per-value binary search
+        bins = numpy.minimum(
+            ((values - lo) * (nbins / (hi - lo))).astype(int), nbins - 1
+        )
+        counts = numpy.bincount(
+            block_ids[finite] * nbins + bins,
+            minlength=nblocks[0] * nblocks[1] * nbins,
+        ).reshape(nblocks[0], nblocks[1], nbins)
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+        block_threshold = numpy.zeros([nblocks[0], nblocks[1]])
+        for i in range(nblocks[0]):
+            for j in range(nblocks[1]):
+                hist = counts[i, j]
+                nonzero = numpy.flatnonzero(hist)
+                if len(nonzero) == 0:
+                    block_threshold[i, j] = 0.0
+                elif len(nonzero) == 1:
+                    # Don't compute blocks with only 1 occupied bin.
+                    block_threshold[i, j] = bin_centers[nonzero[0]]
+                elif three_class:
+                    if len(nonzero) == 2:
+                        # Too few values to separate three classes - the
+                        # occupied bins are the best available thresholds
+                        block_threshold[i, j] = bin_centers[nonzero][bin_wanted]
+                    else:
+                        span = slice(nonzero[0], nonzero[-1] + 1)
+                        block_threshold[i, j] = _multiotsu_from_histogram(
+                            hist[span], bin_centers[span]
+                        )[bin_wanted]
+                else:
+                    span = slice(nonzero[0], nonzero[-1] + 1)
+                    block_threshold[i, j] = _otsu_from_histogram(
+                        hist[span], bin_centers[span]
+                    )
+        return block_threshold
+
     def _correct_global_threshold(self, threshold):
         threshold *= self.threshold_correction_factor.value
         return min(max(threshold, self.threshold_range.min), self.threshold_range.max)
@@ -1053,26 +1251,31 @@ Often a good choice is some multiple of the largest expected object size.
                           Default = np.sd
         """
 
-        average_fn = {
-            RB_MEAN: numpy.mean,
-            RB_MEDIAN: numpy.median,
-            RB_MODE: centrosome.threshold.binned_mode,
-        }.get(self.averaging_method.value, numpy.mean)
+        average_fn = RB_AVERAGE_FNS.get(self.averaging_method.value, numpy.mean)
 
-        variance_fn = {RB_SD: numpy.std, RB_MAD: centrosome.threshold.mad}.get(
-            self.variance_method.value, numpy.std
-        )
+        variance_fn = RB_VARIANCE_FNS.get(self.variance_method.value, numpy.std)
         flat_image = image_data.flatten()
         n_pixels = len(flat_image)
         if n_pixels < 3:
             return 0
 
-        flat_image.sort()
-        if flat_image[0] == flat_image[-1]:
+        if flat_image.min() == flat_image.max():
             return flat_image[0]
         low_chop = int(round(n_pixels * self.lower_outlier_fraction.value))
         hi_chop = n_pixels - int(round(n_pixels * self.upper_outlier_fraction.value))
-        im = flat_image if low_chop == 0 else flat_image[low_chop:hi_chop]
+        if low_chop == 0:
+            im = flat_image
+        elif low_chop >= hi_chop:
+            # Degenerate outlier fractions trim away every pixel; keep the
+            # empty slice (and NaN threshold) of the full-sort version
+            # rather than asking partition for an out-of-bounds index.
+            im = flat_image[low_chop:hi_chop]
+        else:
+            # Only the trim boundaries need to end up in sorted position;
+            # a partial sort gathers the retained pixels between them in
+            # linear time instead of fully sorting the image.
+            flat_image.partition((low_chop, hi_chop - 1))
+            im = flat_image[low_chop:hi_chop]
         mean = average_fn(im)
         sd = variance_fn(im)
         return mean + sd * self.number_of_deviations.value
@@ -1150,7 +1353,7 @@ Often a good choice is some multiple of the largest expected object size.
         measurements.add_measurement(
             cellprofiler_core.measurement.IMAGE,
             cellprofiler_core.measurement.FF_WEIGHTED_VARIANCE % objname,
-            numpy.array([wv], dtype=float),
+            float(wv),
         )
 
         entropies = centrosome.threshold.sum_of_entropies(data, mask, binary_image)
@@ -1158,7 +1361,7 @@ Often a good choice is some multiple of the largest expected object size.
         measurements.add_measurement(
             cellprofiler_core.measurement.IMAGE,
             cellprofiler_core.measurement.FF_SUM_OF_ENTROPIES % objname,
-            numpy.array([entropies], dtype=float),
+            float(entropies),
         )
 
     def get_measurement_columns(self, pipeline, object_name=None):
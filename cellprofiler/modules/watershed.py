@@ -34,6 +34,11 @@ import skimage.measure
 import skimage.morphology
 import skimage.transform
 
+try:
+    from skimage.segmentation import watershed as skimage_watershed
+except ImportError:  # watershed lived in skimage.morphology before scikit-image 0.17
+    from skimage.morphology import watershed as skimage_watershed
+
 import cellprofiler_core.image
 import cellprofiler_core.module
 import cellprofiler_core.object
@@ -271,7 +276,7 @@ the image is not downsampled.
 
                 mask_data = mask.pixel_data
 
-            y_data = skimage.morphology.watershed(
+            y_data = skimage_watershed(
                 image=x_data,
                 markers=markers_data,
                 mask=mask_data,
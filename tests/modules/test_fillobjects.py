@@ -89,6 +89,29 @@ def test_2d_fill_holes(
     numpy.testing.assert_array_equal(actual, expected)
 
 
+def test_2d_small_object_unchanged(
+    module, object_set_empty, objects_empty, workspace_empty
+):
+    # Regression test: an object whose surrounding background fits inside
+    # its bounding box neighborhood must not be filled into a solid block -
+    # the background around an object is not a hole.
+    labels = numpy.zeros((200, 200), dtype=numpy.uint8)
+    i, j = numpy.mgrid[-100:100, -100:100]
+    labels[i ** 2 + j ** 2 <= 400] = 1
+
+    objects_empty.segmented = labels
+
+    module.x_name.value = "InputObjects"
+    module.y_name.value = "OutputObjects"
+    module.size.value = 64.0
+
+    module.run(workspace_empty)
+
+    actual = object_set_empty.get_objects("OutputObjects").segmented
+
+    numpy.testing.assert_array_equal(actual, labels)
+
+
 def test_3d_fill_holes(
     volume_labels, module, object_set_empty, objects_empty, workspace_empty
 ):
@@ -0,0 +1,31 @@
+import numpy
+import numpy.testing
+import skimage.morphology
+
+from cellprofiler.utilities.morphology import dilation
+
+
+def test_dilation_odd_structuring_element():
+    numpy.random.seed(1)
+
+    data = numpy.random.uniform(size=(50, 50)) > 0.9
+
+    structuring_element = skimage.morphology.disk(3).astype(bool)
+
+    expected = skimage.morphology.dilation(data, structuring_element)
+
+    numpy.testing.assert_array_equal(dilation(data, structuring_element), expected)
+
+
+def test_dilation_even_structuring_element():
+    # Even-sized elements must not take the OpenCV fast path - its anchor
+    # convention differs from skimage by one pixel for even dimensions.
+    numpy.random.seed(2)
+
+    data = numpy.random.uniform(size=(50, 50)) > 0.9
+
+    structuring_element = numpy.ones((2, 2), bool)
+
+    expected = skimage.morphology.dilation(data, structuring_element)
+
+    numpy.testing.assert_array_equal(dilation(data, structuring_element), expected)